@@ -38,3 +38,33 @@ class EmptyHWNameOrStatus(Exception):
     """Исключение None значения имени или статуса домашки."""
 
     pass
+
+
+class NotForSending(Exception):
+    """Исключение, о котором не нужно сообщать в Telegram."""
+
+    pass
+
+
+class TelegramError(NotForSending):
+    """Исключение ошибки отправки сообщения в Telegram."""
+
+    pass
+
+
+class EmptyResponseFromAPI(NotForSending):
+    """Исключение пустого ответа API."""
+
+    pass
+
+
+class InvalidResponseCode(Exception):
+    """Исключение неверного кода ответа API."""
+
+    pass
+
+
+class ConnectinError(Exception):
+    """Исключение ошибки соединения с API."""
+
+    pass
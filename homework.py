@@ -1,12 +1,24 @@
+import asyncio
+import atexit
+import collections
 import logging
 import os
+import queue
+import signal
+import socket
 import sys
 import time
 from http import HTTPStatus
+from logging.handlers import QueueHandler, QueueListener
 
+import orjson
 import requests
 import telegram
+from aiolimiter import AsyncLimiter
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from telegram.request import HTTPXRequest
+from urllib3.util.retry import Retry
 
 import exceptions
 
@@ -17,8 +29,54 @@ TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 RETRY_TIME = 600
+ERROR_RETRY_TIME = 5
+NANOSECONDS_IN_SECOND = 1_000_000_000
+RECENT_ERRORS_SIZE = 4
+TELEGRAM_HTTP_VERSION = '2'
+TELEGRAM_MESSAGES_PER_SECOND = 30
+TELEGRAM_RATE_LIMIT = AsyncLimiter(TELEGRAM_MESSAGES_PER_SECOND, 1)
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+HEADERS = {
+    'Authorization': f'OAuth {PRACTICUM_TOKEN}',
+    'Accept': 'application/json',
+}
+REQUEST_TIMEOUT = (5, 30)
+RETRY_STATUSES = (
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+)
+
+TCP_KEEPALIVE_IDLE = 300
+TCP_KEEPALIVE_INTERVAL = 60
+SOCKET_OPTIONS = [
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+if hasattr(socket, 'TCP_KEEPIDLE'):
+    SOCKET_OPTIONS += [
+        (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, TCP_KEEPALIVE_IDLE),
+        (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, TCP_KEEPALIVE_INTERVAL),
+    ]
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """Адаптер, держащий соединение с API открытым между запросами."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        """Создать пул соединений с TCP keepalive."""
+        kwargs['socket_options'] = SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+
+SESSION = requests.Session()
+SESSION.mount('https://', KeepAliveAdapter(
+    pool_connections=1,
+    pool_maxsize=1,
+    max_retries=Retry(
+        total=3, backoff_factor=0.5, status_forcelist=RETRY_STATUSES),
+))
 
 
 HOMEWORK_STATUSES = {
@@ -26,49 +84,57 @@ HOMEWORK_STATUSES = {
     'reviewing': 'Работа взята на проверку ревьюером.',
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
+STATUS_TEMPLATE = 'Изменился статус проверки работы "{}" {}'
+NO_NEW_STATUSES = 'Нет новых статусов работ.'
+FAILURE_MESSAGE = 'Сбой в работе программы: %s'
 
 
-def send_message(bot, message):
+async def send_message(bot, message):
     """Отправляет сообщение в Telegram чат."""
     try:
         logging.info('Начало отправки')
-        bot.send_message(
-            chat_id=TELEGRAM_CHAT_ID,
-            text=message,
-        )
-    except exceptions.TelegramError as error:
+        async with TELEGRAM_RATE_LIMIT:
+            await bot.send_message(
+                chat_id=TELEGRAM_CHAT_ID,
+                text=message,
+            )
+    except telegram.error.TelegramError as error:
         raise exceptions.TelegramError(
             f'Не удалось отправить сообщение {error}')
     else:
-        logging.info(f'Сообщение отправлено {message}')
+        logging.info('Сообщение отправлено %s', message)
 
 
 def get_api_answer(current_timestamp):
     """Получить статус домашней работы."""
-    timestamp = current_timestamp or int(time.time())
+    timestamp = current_timestamp or time.time_ns() // NANOSECONDS_IN_SECOND
     params_request = {
         'url': ENDPOINT,
         'headers': HEADERS,
         'params': {'from_date': timestamp},
+        'timeout': REQUEST_TIMEOUT,
     }
     try:
         logging.info(
-            'Начало запроса: url = {url},'
-            'headers = {headers},'
-            'params = {params}'.format(**params_request))
-        homework_statuses = requests.get(**params_request)
+            'Начало запроса: url = %(url)s,'
+            'headers = %(headers)s,'
+            'params = %(params)s', params_request)
+        homework_statuses = SESSION.get(**params_request)
         if homework_statuses.status_code != HTTPStatus.OK:
             raise exceptions.InvalidResponseCode(
                 'Не удалось получить ответ API, '
                 f'ошибка: {homework_statuses.status_code}'
                 f'причина: {homework_statuses.reason}'
                 f'текст: {homework_statuses.text}')
-        return homework_statuses.json()
-    except Exception:
+        logging.debug(
+            'Сжатие ответа API: %s',
+            homework_statuses.headers.get('Content-Encoding'))
+        return orjson.loads(homework_statuses.content)
+    except Exception as error:
         raise exceptions.ConnectinError(
             'Не верный код ответа параметры запроса: url = {url},'
             'headers = {headers},'
-            'params = {params}'.format(**params_request))
+            'params = {params}'.format(**params_request)) from error
 
 
 def check_response(response):
@@ -76,81 +142,144 @@ def check_response(response):
     logging.debug('Начало проверки')
     if not isinstance(response, dict):
         raise TypeError('Ошибка в типе ответа API')
-    if 'homeworks' not in response or 'current_date' not in response:
-        raise exceptions.EmptyResponseFromAPI('Пустой ответ от API')
     homeworks = response.get('homeworks')
+    if homeworks is None or 'current_date' not in response:
+        raise exceptions.EmptyResponseFromAPI('Пустой ответ от API')
     if not isinstance(homeworks, list):
-        raise KeyError('Homeworks не является списком')
+        raise TypeError('Homeworks не является списком')
     return homeworks
 
 
 def parse_status(homework):
     """Распарсить ответ."""
-    if 'homework_name' not in homework:
-        raise KeyError('В ответе отсутсвует ключ homework_name')
-    homework_name = homework.get('homework_name')
-    homework_status = homework.get('status')
-    if homework_status not in HOMEWORK_STATUSES:
+    try:
+        homework_name = homework['homework_name']
+        homework_status = homework['status']
+    except KeyError as error:
+        raise KeyError(f'В ответе отсутсвует ключ {error}')
+    try:
+        verdict = HOMEWORK_STATUSES[homework_status]
+    except KeyError:
         raise ValueError(f'Неизвестный статус работы - {homework_status}')
-    return(
-        'Изменился статус проверки работы "{homework_name}" {verdict}'
-    ).format(
-        homework_name=homework_name,
-        verdict=HOMEWORK_STATUSES[homework_status]
-    )
+    return STATUS_TEMPLATE.format(homework_name, verdict)
 
 
 def check_tokens():
     """Проверка доступности переменных окружения."""
-    return all([TELEGRAM_TOKEN, PRACTICUM_TOKEN, TELEGRAM_CHAT_ID])
+    tokens = (
+        ('PRACTICUM_TOKEN', PRACTICUM_TOKEN),
+        ('TELEGRAM_TOKEN', TELEGRAM_TOKEN),
+        ('TELEGRAM_CHAT_ID', TELEGRAM_CHAT_ID),
+    )
+    missing = [name for name, value in tokens if not value]
+    if missing:
+        logging.critical(
+            'Отсутствуют переменные окружения: %s', ', '.join(missing))
+    return not missing
 
 
-def main():
-    """Основная логика работы бота."""
-    if not check_tokens():
-        logging.critical('Отсутствует необходимое кол-во'
-                         ' переменных окружения')
-        sys.exit('Отсутсвуют переменные окружения')
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    current_timestamp = int(time.time())
-    current_report = {
-        'name': '',
-        'output': ''
-    }
-    prev_report = current_report.copy()
+def get_retry_delay(error_attempt, next_deadline):
+    """Вычислить паузу до следующего запроса."""
+    if error_attempt:
+        return min(RETRY_TIME, ERROR_RETRY_TIME * 2 ** (error_attempt - 1))
+    return max(0, next_deadline - time.monotonic())
+
+
+def get_status_message(homeworks, previous_message):
+    """Сформировать сообщение по последней домашней работе."""
+    if homeworks:
+        return parse_status(homeworks[0])
+    return previous_message or NO_NEW_STATUSES
+
+
+def get_error_key(error):
+    """Получить ключ ошибки для подавления повторных сообщений."""
+    try:
+        return hash((type(error), error.args))
+    except TypeError:
+        return hash((type(error), str(error)))
+
+
+async def report_error(bot, error, recent_errors):
+    """Сообщить об ошибке в Telegram, если о ней ещё не сообщали."""
+    error_key = get_error_key(error)
+    if error_key in recent_errors:
+        return
+    try:
+        await send_message(bot, FAILURE_MESSAGE % error)
+    except exceptions.TelegramError as send_error:
+        logging.error('Не удалось сообщить об ошибке: %s', send_error)
+    else:
+        recent_errors.append(error_key)
+
+
+async def wait_for_stop(stop, delay):
+    """Дождаться сигнала остановки, но не дольше delay секунд."""
+    try:
+        await asyncio.wait_for(stop.wait(), delay)
+    except asyncio.TimeoutError:
+        return False
+    return True
+
+
+async def poll_updates(bot, stop):
+    """Опрашивать API и сообщать об изменениях до сигнала остановки."""
+    current_timestamp = time.time_ns() // NANOSECONDS_IN_SECOND
+    status_message = prev_status_message = ''
+    recent_errors = collections.deque(maxlen=RECENT_ERRORS_SIZE)
+    error_attempt = 0
     while True:
+        next_deadline = time.monotonic() + RETRY_TIME
         try:
-            response = get_api_answer(current_timestamp)
+            response = await asyncio.to_thread(
+                get_api_answer, current_timestamp)
+            status_message = get_status_message(
+                check_response(response), status_message)
             current_timestamp = response.get(
-                'current_data', current_timestamp)
-            new_homeworks = check_response(response)
-            if new_homeworks:
-                homework = new_homeworks[0]
-                current_report['name'] = homework.get('homework_name')
-                current_report['output'] = homework.get('status')
-            else:
-                current_report['output'] = 'Нет новых статусов работ.'
-            if current_report != prev_report:
-                send = f' {current_report["name"]}, {current_report["output"]}'
-                send_message(bot, send)
-                prev_report = current_report.copy()
+                'current_date', current_timestamp)
+            if status_message != prev_status_message:
+                await send_message(bot, status_message)
+                prev_status_message = status_message
             else:
                 logging.debug('Статус не поменялся')
+            recent_errors.clear()
+            error_attempt = 0
         except exceptions.NotForSending as error:
-            message = f'Сбой в работе программы: {error}'
-            logging.error(message)
+            logging.exception(FAILURE_MESSAGE, error)
+            error_attempt += 1
         except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            current_report['output'] = message
-            logging.error(message)
-            if current_report != prev_report:
-                send_message(bot, message)
-                prev_report = current_report.copy
-        finally:
-            time.sleep(RETRY_TIME)
+            logging.exception(FAILURE_MESSAGE, error)
+            await report_error(bot, error, recent_errors)
+            error_attempt += 1
+        delay = get_retry_delay(error_attempt, next_deadline)
+        if await wait_for_stop(stop, delay):
+            logging.info('Получен сигнал остановки, бот завершает работу')
+            return
+
+
+async def main():
+    """Основная логика работы бота."""
+    if not check_tokens():
+        sys.exit('Отсутсвуют переменные окружения')
+    stop = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    bot = telegram.Bot(
+        token=TELEGRAM_TOKEN,
+        request=HTTPXRequest(http_version=TELEGRAM_HTTP_VERSION),
+    )
+    async with bot:
+        await poll_updates(bot, stop)
 
 
 if __name__ == '__main__':
+    log_queue = queue.SimpleQueue()
+    log_listener = QueueListener(
+        log_queue,
+        logging.FileHandler('log.txt', encoding='UTF-8'),
+        logging.StreamHandler(sys.stdout),
+    )
+    log_listener.start()
+    atexit.register(log_listener.stop)
     logging.basicConfig(
         level=logging.INFO,
         format=(
@@ -158,6 +287,5 @@ if __name__ == '__main__':
             'Файл - %(filename)s, Функция - %(funcName)s, '
             'Номер строки - %(lineno)d, %(message)s'
         ),
-        handlers=[logging.FileHandler('log.txt', encoding='UTF-8'),
-                  logging.StreamHandler(sys.stdout)])
-    main()
+        handlers=[QueueHandler(log_queue)])
+    asyncio.run(main())
@@ -1,3 +1,6 @@
+import asyncio
+import json
+import logging
 import os
 from http import HTTPStatus
 
@@ -44,6 +47,7 @@ class MockResponseGET:
         )
         self.random_timestamp = random_timestamp
         self.status_code = http_status
+        self.headers = {'Content-Encoding': 'br'}
 
     def json(self):
         data = {
@@ -52,6 +56,10 @@ class MockResponseGET:
         }
         return data
 
+    @property
+    def content(self):
+        return json.dumps(self.json()).encode('utf-8')
+
 
 class MockTelegramBot:
 
@@ -73,6 +81,38 @@ class MockTelegramBot:
         return self.random_timestamp
 
 
+class MockAsyncTelegramBot:
+
+    def __init__(self, token=None, error=None, **kwargs):
+        assert token is not None, (
+            'Проверьте, что вы передали токен бота Telegram'
+        )
+        self.error = error
+        self.sent = []
+        self.initialized = False
+        self.shut_down = False
+
+    async def __aenter__(self):
+        self.initialized = True
+        return self
+
+    async def __aexit__(self, *args):
+        self.shut_down = True
+
+    async def send_message(self, chat_id=None, text=None, **kwargs):
+        assert chat_id is not None, (
+            'Проверьте, что вы передали chat_id= при отправке '
+            'сообщения ботом Telegram'
+        )
+        assert text is not None, (
+            'Проверьте, что вы передали text= при отправке '
+            'сообщения ботом Telegram'
+        )
+        if self.error is not None:
+            raise self.error
+        self.sent.append(text)
+
+
 class TestHomework:
     HOMEWORK_STATUSES = {
         'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
@@ -150,6 +190,37 @@ class TestHomework:
             f'функция {func_name} возвращает True'
         )
 
+    def test_check_tokens_logs_missing(self, monkeypatch, caplog):
+        import homework
+
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'sometoken')
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', None)
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', '')
+
+        func_name = 'check_tokens'
+        with caplog.at_level(logging.CRITICAL):
+            assert not homework.check_tokens()
+        messages = [
+            record.getMessage() for record in caplog.records
+            if record.levelno == logging.CRITICAL
+        ]
+        assert len(messages) == 1, (
+            f'Убедитесь, что функция `{func_name}` логирует отсутствие '
+            'переменных окружения с уровнем CRITICAL'
+        )
+        assert 'TELEGRAM_TOKEN' in messages[0], (
+            f'Убедитесь, что функция `{func_name}` перечисляет '
+            'отсутствующие переменные окружения'
+        )
+        assert 'TELEGRAM_CHAT_ID' in messages[0], (
+            f'Убедитесь, что функция `{func_name}` перечисляет '
+            'отсутствующие переменные окружения'
+        )
+        assert 'PRACTICUM_TOKEN' not in messages[0], (
+            f'Убедитесь, что функция `{func_name}` не перечисляет '
+            'заданные переменные окружения'
+        )
+
     def test_bot_init_not_global(self):
         import homework
 
@@ -178,6 +249,61 @@ class TestHomework:
         import homework
         utils.check_function(homework, 'send_message', 2)
 
+    def test_send_message_awaits_bot(self, monkeypatch):
+        import exceptions
+        import homework
+
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+
+        func_name = 'send_message'
+        bot = MockAsyncTelegramBot(token='1234:abcdefg')
+        asyncio.run(homework.send_message(bot, 'x'))
+        assert bot.sent == ['x'], (
+            f'Проверьте, что функция `{func_name}` дожидается '
+            'отправки сообщения ботом Telegram'
+        )
+
+        bot = MockAsyncTelegramBot(
+            token='1234:abcdefg',
+            error=telegram.error.TelegramError('network down'),
+        )
+        try:
+            asyncio.run(homework.send_message(bot, 'x'))
+        except exceptions.TelegramError:
+            pass
+        else:
+            assert False, (
+                f'Убедитесь, что функция `{func_name}` оборачивает '
+                '`telegram.error.TelegramError` в `exceptions.TelegramError`'
+            )
+
+    def test_send_message_rate_limited(self, monkeypatch):
+        import homework
+
+        events = []
+
+        class RecordingLimiter:
+            async def __aenter__(self):
+                events.append('enter')
+
+            async def __aexit__(self, *args):
+                events.append('exit')
+
+        class RecordingBot(MockAsyncTelegramBot):
+            async def send_message(self, **kwargs):
+                events.append('send')
+                await super().send_message(**kwargs)
+
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+        monkeypatch.setattr(homework, 'TELEGRAM_RATE_LIMIT', RecordingLimiter())
+
+        asyncio.run(
+            homework.send_message(RecordingBot(token='1234:abcdefg'), 'x'))
+        assert events == ['enter', 'send', 'exit'], (
+            'Убедитесь, что функция `send_message` отправляет сообщение '
+            'внутри `TELEGRAM_RATE_LIMIT`'
+        )
+
     def test_get_api_answers(self, monkeypatch, random_timestamp,
                              current_timestamp, api_url):
         def mock_response_get(*args, **kwargs):
@@ -186,10 +312,10 @@ class TestHomework:
                 current_timestamp=current_timestamp, **kwargs
             )
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'get_api_answer'
         utils.check_function(homework, func_name, 1)
 
@@ -215,6 +341,73 @@ class TestHomework:
             'ключа `current_date`'
         )
 
+    def test_session_adapter_settings(self):
+        import homework
+
+        adapter = homework.SESSION.get_adapter(homework.ENDPOINT)
+        pool_kw = adapter.poolmanager.connection_pool_kw
+        assert pool_kw['socket_options'] == homework.SOCKET_OPTIONS, (
+            'Убедитесь, что адаптер сессии передаёт `SOCKET_OPTIONS` '
+            'в пул соединений'
+        )
+        assert pool_kw['maxsize'] == 1, (
+            'Убедитесь, что пул соединений сессии рассчитан на одно '
+            'соединение'
+        )
+        assert adapter.max_retries.total == 3, (
+            'Убедитесь, что адаптер сессии повторяет неудачные запросы'
+        )
+        assert (
+            set(adapter.max_retries.status_forcelist)
+            == set(homework.RETRY_STATUSES)
+        ), (
+            'Убедитесь, что адаптер сессии повторяет запросы '
+            'при кодах из `RETRY_STATUSES`'
+        )
+
+    def test_get_api_answer_reuses_session(self, monkeypatch,
+                                           random_timestamp,
+                                           current_timestamp, api_url):
+        calls = []
+
+        def mock_response_get(*args, **kwargs):
+            calls.append(args)
+            return MockResponseGET(
+                *args, random_timestamp=random_timestamp,
+                current_timestamp=current_timestamp, **kwargs
+            )
+
+        def mock_requests_get(*args, **kwargs):
+            assert False, (
+                'Убедитесь, что запрос к API выполняется через '
+                'общую сессию `SESSION`, а не через `requests.get`'
+            )
+
+        import homework
+
+        monkeypatch.setattr(requests, 'get', mock_requests_get)
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
+        func_name = 'get_api_answer'
+        homework.get_api_answer(current_timestamp)
+        homework.get_api_answer(current_timestamp)
+        assert len(calls) == 2, (
+            f'Проверьте, что функция `{func_name}` '
+            'выполняет запросы через `SESSION.get`'
+        )
+
+    def test_session_accepts_brotli(self):
+        import homework
+
+        accept_encoding = homework.SESSION.headers['Accept-Encoding']
+        assert 'br' in accept_encoding, (
+            'Убедитесь, что установлен Brotli и сессия запрашивает '
+            'ответ API в сжатии br'
+        )
+        assert 'gzip' in accept_encoding, (
+            'Убедитесь, что сессия запрашивает ответ API в сжатии gzip'
+        )
+
     def test_get_500_api_answer(self, monkeypatch, random_timestamp,
                                 current_timestamp, api_url):
         def mock_500_response_get(*args, **kwargs):
@@ -232,10 +425,10 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_500_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_500_response_get)
+
         func_name = 'get_api_answer'
         try:
             homework.get_api_answer(current_timestamp)
@@ -315,10 +508,10 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'check_response'
         response = homework.get_api_answer(current_timestamp)
         status = homework.check_response(response)
@@ -352,10 +545,10 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'parse_status'
         response = homework.get_api_answer(current_timestamp)
         homeworks = homework.check_response(response)
@@ -400,10 +593,10 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'parse_status'
         response = homework.get_api_answer(current_timestamp)
         homeworks = homework.check_response(response)
@@ -448,10 +641,10 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'parse_status'
         response = homework.get_api_answer(current_timestamp)
         homeworks = homework.check_response(response)
@@ -484,10 +677,10 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_no_homeworks_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_no_homeworks_response_get)
+
         func_name = 'check_response'
         result = homework.get_api_answer(current_timestamp)
         try:
@@ -525,10 +718,10 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'check_response'
         response = homework.get_api_answer(current_timestamp)
         try:
@@ -565,10 +758,10 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'check_response'
         response = homework.get_api_answer(current_timestamp)
         try:
@@ -599,10 +792,10 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_empty_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_empty_response_get)
+
         func_name = 'check_response'
         result = homework.get_api_answer(current_timestamp)
         try:
@@ -626,10 +819,10 @@ class TestHomework:
             )
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'check_response'
         try:
             homework.get_api_answer(current_timestamp)
@@ -640,3 +833,218 @@ class TestHomework:
                 f'Убедитесь, что в функции `{func_name}` обрабатываете ситуацию, '
                 'когда API возвращает код, отличный от 200'
             )
+
+    def test_get_retry_delay(self, monkeypatch):
+        import homework
+
+        func_name = 'get_retry_delay'
+        utils.check_function(homework, func_name, 2)
+
+        monkeypatch.setattr(homework.time, 'monotonic', lambda: 1000)
+        delays = [
+            homework.get_retry_delay(attempt, 0) for attempt in range(1, 10)
+        ]
+        assert delays == [5, 10, 20, 40, 80, 160, 320, 600, 600], (
+            f'Проверьте, что функция `{func_name}` после ошибок '
+            'удваивает паузу, начиная с `ERROR_RETRY_TIME`, '
+            'но не больше `RETRY_TIME`'
+        )
+        assert homework.get_retry_delay(0, 1000 + 420) == 420, (
+            f'Проверьте, что функция `{func_name}` без ошибок '
+            'ждёт до конца текущего периода опроса'
+        )
+        assert homework.get_retry_delay(0, 1000 - 1) == 0, (
+            f'Проверьте, что функция `{func_name}` не возвращает '
+            'отрицательную паузу, если период опроса уже истёк'
+        )
+
+    def test_get_error_key(self):
+        import homework
+
+        func_name = 'get_error_key'
+        utils.check_function(homework, func_name, 1)
+
+        assert (
+            homework.get_error_key(TypeError('Ошибка в типе ответа API'))
+            == homework.get_error_key(TypeError('Ошибка в типе ответа API'))
+        ), (
+            f'Проверьте, что функция `{func_name}` возвращает одинаковый '
+            'ключ для одинаковых ошибок'
+        )
+        assert (
+            homework.get_error_key(TypeError('x'))
+            != homework.get_error_key(ValueError('x'))
+        ), (
+            f'Проверьте, что функция `{func_name}` различает типы ошибок'
+        )
+        assert (
+            homework.get_error_key(ValueError({'status': 'unknown'}))
+            == homework.get_error_key(ValueError({'status': 'unknown'}))
+        ), (
+            f'Проверьте, что функция `{func_name}` работает для ошибок '
+            'с нехешируемыми аргументами'
+        )
+
+    def test_report_error_suppresses_repeats(self, monkeypatch):
+        import collections
+
+        import homework
+
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+
+        func_name = 'report_error'
+        bot = MockAsyncTelegramBot(token='1234:abcdefg')
+        recent_errors = collections.deque(maxlen=homework.RECENT_ERRORS_SIZE)
+        error = ValueError('Неизвестный статус работы - unknown')
+
+        asyncio.run(homework.report_error(bot, error, recent_errors))
+        asyncio.run(homework.report_error(bot, error, recent_errors))
+        assert len(bot.sent) == 1, (
+            f'Проверьте, что функция `{func_name}` не отправляет '
+            'повторно ту же ошибку'
+        )
+
+        recent_errors.clear()
+        asyncio.run(homework.report_error(bot, error, recent_errors))
+        assert len(bot.sent) == 2, (
+            f'Проверьте, что функция `{func_name}` снова сообщает об '
+            'ошибке после успешного запроса'
+        )
+
+        recent_errors.clear()
+        bot.error = telegram.error.TelegramError('network down')
+        asyncio.run(homework.report_error(bot, error, recent_errors))
+        assert not recent_errors, (
+            f'Убедитесь, что функция `{func_name}` не запоминает ошибку, '
+            'сообщение о которой не удалось отправить'
+        )
+
+    @staticmethod
+    def run_main(monkeypatch, answers, wait_for_stop=None, bots=None):
+        import homework
+
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'sometoken')
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '1234:abcdefg')
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+
+        if bots is None:
+            bots = []
+
+        def mock_telegram_bot(*args, **kwargs):
+            bots.append(MockAsyncTelegramBot(*args, **kwargs))
+            return bots[-1]
+
+        timestamps = []
+        answers = list(answers)
+
+        def mock_get_api_answer(current_timestamp):
+            timestamps.append(current_timestamp)
+            answer = answers.pop(0)
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+
+        async def mock_wait_for_stop(stop, delay):
+            return not answers
+
+        if wait_for_stop is not None:
+            mock_wait_for_stop = wait_for_stop
+        monkeypatch.setattr(homework.telegram, 'Bot', mock_telegram_bot)
+        monkeypatch.setattr(homework, 'get_api_answer', mock_get_api_answer)
+        monkeypatch.setattr(homework, 'wait_for_stop', mock_wait_for_stop)
+        asyncio.run(homework.main())
+        return bots[0], timestamps
+
+    def test_main_reports_error_again_after_recovery(self, monkeypatch):
+        import homework
+
+        error = TypeError('Ошибка в типе ответа API')
+        ok = {'homeworks': [], 'current_date': 1}
+        bot, _ = self.run_main(monkeypatch, [error, error, ok, error])
+        sent = bot.sent
+        failure = homework.FAILURE_MESSAGE % error
+        assert sent.count(failure) == 2, (
+            'Убедитесь, что `main` не повторяет сообщение об ошибке во время '
+            'сбоя, но снова сообщает о ней после успешного запроса'
+        )
+
+    def test_get_status_message(self, random_timestamp):
+        import homework
+
+        func_name = 'get_status_message'
+        utils.check_function(homework, func_name, 2)
+
+        homeworks = [{
+            'homework_name': str(random_timestamp),
+            'status': 'approved',
+        }]
+        result = homework.get_status_message(homeworks, '')
+        assert result == homework.parse_status(homeworks[0]), (
+            f'Проверьте, что функция `{func_name}` возвращает вердикт '
+            'из `parse_status`, а не статус работы'
+        )
+        assert homework.get_status_message([], result) == result, (
+            f'Проверьте, что функция `{func_name}` сохраняет предыдущее '
+            'сообщение, если новых домашних работ нет'
+        )
+        assert (
+            homework.get_status_message([], '') == homework.NO_NEW_STATUSES
+        ), (
+            f'Проверьте, что функция `{func_name}` при первом запуске '
+            'без домашних работ сообщает, что новых статусов нет'
+        )
+
+    def test_main_advances_timestamp_on_valid_response(self, monkeypatch):
+        answers = [
+            {
+                'homeworks': [{'homework_name': 'hw', 'status': 'unknown'}],
+                'current_date': 100,
+            },
+            {'current_date': 200},
+            {
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 300,
+            },
+            {'homeworks': [], 'current_date': 400},
+        ]
+        _, timestamps = self.run_main(monkeypatch, answers)
+        assert timestamps[1] == timestamps[0], (
+            'Убедитесь, что `main` не сдвигает `current_timestamp`, '
+            'если статус домашней работы не удалось разобрать'
+        )
+        assert timestamps[2] == timestamps[0], (
+            'Убедитесь, что `main` не сдвигает `current_timestamp`, '
+            'если ответ API не прошёл проверку'
+        )
+        assert timestamps[3] == 300, (
+            'Убедитесь, что `main` сдвигает `current_timestamp` '
+            'на `current_date` из корректного ответа API'
+        )
+
+    def test_main_shuts_bot_down(self, monkeypatch):
+        class Crash(Exception):
+            pass
+
+        async def crashing_wait_for_stop(stop, delay):
+            raise Crash
+
+        ok = {'homeworks': [], 'current_date': 1}
+        bot, _ = self.run_main(monkeypatch, [ok])
+        assert bot.initialized and bot.shut_down, (
+            'Убедитесь, что `main` инициализирует бота и завершает '
+            'его работу при остановке'
+        )
+
+        bots = []
+        try:
+            self.run_main(
+                monkeypatch, [ok],
+                wait_for_stop=crashing_wait_for_stop, bots=bots)
+        except Crash:
+            pass
+        else:
+            assert False, 'Ошибка вне цикла опроса должна выходить из `main`'
+        assert bots[0].shut_down, (
+            'Убедитесь, что `main` завершает работу бота, даже если '
+            'цикл опроса прервался исключением'
+        )